@@ -1,4 +1,7 @@
 import logging
+import logging.handlers
+import atexit
+import queue
 import os
 
 class CustomFormatter(logging.Formatter):
@@ -19,11 +22,6 @@ class CustomFormatter(logging.Formatter):
         # Logger String Format
         self.log_fmt = f"%(asctime)s - %(levelname)s - %(name)s - %(message)s (%(filename)s:%(lineno)d)"
 
-    def format(self, record):
-        """
-        Format the logger.
-        """
-
         # Select color based on level
         level_colors = {
             logging.DEBUG: self.COLORS['grey'],
@@ -31,10 +29,19 @@ class CustomFormatter(logging.Formatter):
             logging.WARNING: self.COLORS['yellow'],
             logging.ERROR: self.COLORS['red']
         }
-        
-        color = level_colors.get(record.levelno, self.COLORS['reset'])
-        formatter = logging.Formatter(color + self.log_fmt + self.COLORS['reset'])
-        return formatter.format(record)
+
+        # One formatter per level, built once
+        self._by_level = {
+            level: logging.Formatter(color + self.log_fmt + self.COLORS['reset'])
+            for level, color in level_colors.items()
+        }
+        self._default = logging.Formatter(self.COLORS['reset'] + self.log_fmt + self.COLORS['reset'])
+
+    def format(self, record):
+        """
+        Format the logger.
+        """
+        return self._by_level.get(record.levelno, self._default).format(record)
 
 class BaseLogger():
     """
@@ -54,14 +61,19 @@ class BaseLogger():
         console_handler = logging.StreamHandler()
         console_handler.setLevel(logging.DEBUG)
         console_handler.setFormatter(CustomFormatter())
-        self.logger.addHandler(console_handler)
 
         # Set up file handler for logging to a file
         filename = f"{log_name}.log"
         file_handler = logging.FileHandler(filename, mode='w')
         file_fmt = logging.Formatter("%(asctime)s - %(levelname)s - %(name)s - %(message)s")
         file_handler.setFormatter(file_fmt)
-        self.logger.addHandler(file_handler)
+
+        # Records are only queued by the caller, a background thread writes them to both outputs
+        log_queue = queue.Queue(-1)
+        self.logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        self.log_listener = logging.handlers.QueueListener(log_queue, console_handler, file_handler, respect_handler_level=True)
+        self.log_listener.start()
+        atexit.register(self.log_listener.stop)
 
         # Set the requested global log level
         self.logger.setLevel(log_level)
\ No newline at end of file
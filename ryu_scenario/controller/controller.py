@@ -1,12 +1,17 @@
 from ryu.base import app_manager
 from ryu.controller import ofp_event
 from ryu.controller.handler import MAIN_DISPATCHER, DEAD_DISPATCHER, set_ev_cls
-from ryu.lib.packet import packet, ethernet, arp, ipv4, ether_types
+from ryu.lib.packet import packet, arp, ipv4, ether_types
 from ryu.lib import hub
 from ryu.ofproto import ofproto_v1_3
 from ryu.topology import event as topo_event
 from ryu.app.wsgi import WSGIApplication
 import networkx as nx
+import logging
+import socket
+import struct
+import time
+from collections import defaultdict
 from controller_api import RestAPI
 import os, sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -25,6 +30,7 @@ class Controller(app_manager.RyuApp):
         
         # Role Management
         self.switches_roles = {}
+        self._role_gen = {}                 # dpid -> generation ID of the last role request sent to it
         
         # Load Balancing Metrics
         self.packet_in_count = 0
@@ -32,6 +38,26 @@ class Controller(app_manager.RyuApp):
     
         # Creating the network graph
         self.network = nx.DiGraph()
+        # Flat views of the graph for the PacketIn hot path
+        self._out_port = {}                 # (node, neighbor) -> output port on node
+        self._adj = {}                      # node -> [neighbors]
+
+        # Link/host events are buffered and added to the graph in bulk
+        self.TOPOLOGY_FLUSH_DELAY = 0.1
+        self._pending_nodes = []
+        self._pending_edges = []
+        self._flush_thread = None
+
+        # All-pairs shortest paths, rebuilt shortly after topology changes
+        self.PATHS_REBUILD_DELAY = 0.2
+        self._apsp = {}
+        self._nh_port = {}                  # dpid -> {destination: output port}, flattened from _apsp
+        self._proactive = {}                # dpid -> {host_ip: output port} of the preinstalled IPv4 flows
+        self._rebuild_thread = None
+
+        # In-flight flows: (src_ip, dst_ip) -> time of the PacketIn that installed them
+        self.INFLIGHT_WINDOW = 0.01
+        self._inflight = {}
 
         self.MONITOR_PERIOD = 30
         self.monitor_thread = hub.spawn(self.monitor)
@@ -50,6 +76,15 @@ class Controller(app_manager.RyuApp):
         self.IP_ICMP = 0X01 # Byte PROTOCOL in IP header
         self.IP_TCP = 0x06  # Byte PROTOCOL in IP header
         self.DEFAULT_HOST_PORT = 1
+        # Only OpenFlow 1.3 is spoken, so its constants are the same for every datapath
+        self.OFPP_FLOOD = ofproto_v1_3.OFPP_FLOOD
+        self.OFP_NO_BUFFER = ofproto_v1_3.OFP_NO_BUFFER
+        # Minimum frame lengths read by the PacketIn fast path (Ethernet + ARP / IPv4 addresses)
+        self.ETH_HEADER_LEN = 14
+        self.ARP_FRAME_LEN = 42
+        self.IPV4_FRAME_LEN = 34
+        self._table_miss = {}               # ofproto_parser -> (match, actions) of the table-miss rule
+        self.topology_body = None           # Serialized /topology response, None when it must be rebuilt
         
     # FUNCTIONS TO ADD ELEMENTS TO THE NETWORK
     
@@ -59,16 +94,20 @@ class Controller(app_manager.RyuApp):
         switch = ev.switch
         dp = switch.dp
         dpid = dp.id
-        self.logger.info(f"Switch s{dpid} detected")
+        self.logger.info("Switch s%s detected", dpid)
         self.datapaths[dpid] = dp
         # Add the switch (node) to the network graph
         self.network.add_node(dpid, type=self.SWITCH_TYPE, name=f"s{dpid}", dp=dp, tx_pkts=0, num_flows=0)
+        self.invalidate_paths()
 
         # Default Rule - Table Miss (send to controller)
-        ofproto = dp.ofproto
+        # Match and actions are the same for every switch, so they are built once per parser
         parser = dp.ofproto_parser
-        match = parser.OFPMatch()
-        actions = [parser.OFPActionOutput(ofproto.OFPP_CONTROLLER,ofproto.OFPCML_NO_BUFFER)] 
+        if parser not in self._table_miss:
+            ofproto = dp.ofproto
+            self._table_miss[parser] = (parser.OFPMatch(),
+                                        [parser.OFPActionOutput(ofproto.OFPP_CONTROLLER,ofproto.OFPCML_NO_BUFFER)])
+        match, actions = self._table_miss[parser]
         self.add_flow(dp=dp, table=self.DEFAULT_TABLE, priority=self.LOW_PRIORITY, match=match, actions=actions)
         
     # Function to handle link enter event
@@ -79,11 +118,14 @@ class Controller(app_manager.RyuApp):
         src_port = link.src.port_no
         dst = link.dst.dpid
         dst_port = link.dst.port_no
-        self.logger.info(f"Link s{src} <--> s{dst} detected")
+        self.logger.info("Link s%s <--> s%s detected", src, dst)
 
         # Adding the switches and links
-        self.network.add_edge(src, dst, src_port=src_port, dst_port=dst_port)
-        self.network.add_edge(dst, src, src_port=dst_port, dst_port=src_port)
+        self._pending_edges.append((src, dst, {'src_port': src_port, 'dst_port': dst_port}))
+        self._pending_edges.append((dst, src, {'src_port': dst_port, 'dst_port': src_port}))
+        self._add_adjacency(src, dst, src_port)
+        self._add_adjacency(dst, src, dst_port)
+        self._schedule_topology_flush()
 
     # Function to handle host add event
     @set_ev_cls(topo_event.EventHostAdd, MAIN_DISPATCHER)
@@ -93,32 +135,232 @@ class Controller(app_manager.RyuApp):
         host_mac = host.mac
         dpid = host.port.dpid
         dpid_port = host.port.port_no
-        self.logger.info(f"Host {host_mac} ({host_ipv4}) detected")
+        self.logger.info("Host %s (%s) detected", host_mac, host_ipv4)
 
         # Adding the host and its links to the switch
-        self.network.add_node(host_ipv4, type=self.HOST_TYPE, mac=host_mac)
-        self.network.add_edge(host_ipv4, dpid, src_port=self.DEFAULT_HOST_PORT, dst_port=dpid_port)
-        self.network.add_edge(dpid, host_ipv4, src_port=dpid_port, dst_port=self.DEFAULT_HOST_PORT)
+        self._pending_nodes.append((host_ipv4, {'type': self.HOST_TYPE, 'name': f"h{host_ipv4}", 'mac': host_mac}))
+        self._pending_edges.append((host_ipv4, dpid, {'src_port': self.DEFAULT_HOST_PORT, 'dst_port': dpid_port}))
+        self._pending_edges.append((dpid, host_ipv4, {'src_port': dpid_port, 'dst_port': self.DEFAULT_HOST_PORT}))
+        self._add_adjacency(host_ipv4, dpid, self.DEFAULT_HOST_PORT)
+        self._add_adjacency(dpid, host_ipv4, dpid_port)
+        self._schedule_topology_flush()
+
+    def _schedule_topology_flush(self):
+        """
+        Schedules the bulk insertion of the buffered nodes and edges into the graph.
+        """
+        if self._flush_thread is None:
+            self._flush_thread = hub.spawn_after(self.TOPOLOGY_FLUSH_DELAY, self._flush_topology)
+
+    def _flush_topology(self):
+        """
+        Adds every buffered node and edge to the network graph at once.
+        """
+        self._flush_thread = None
+        nodes, self._pending_nodes = self._pending_nodes, []
+        edges, self._pending_edges = self._pending_edges, []
+        self.network.add_nodes_from(nodes)
+        self.network.add_edges_from(edges)
+        self.invalidate_paths()
+
+    def _add_adjacency(self, src, dst, src_port):
+        """
+        Mirrors a directed edge of the network graph into the flat lookup dicts.
+        """
+        self._out_port[(src, dst)] = src_port
+        neighbors = self._adj.setdefault(src, [])
+        if dst not in neighbors:
+            neighbors.append(dst)
+
+    def invalidate_paths(self):
+        """
+        Drops every cached path and the /topology body after a topology change and
+        schedules the all-pairs rebuild, so bursts of topology events are coalesced.
+        """
+        self.topology_body = None
+        self._apsp = {}
+        self._nh_port = {}
+        if self._rebuild_thread is None:
+            self._rebuild_thread = hub.spawn_after(self.PATHS_REBUILD_DELAY, self._rebuild_paths)
+
+    def _rebuild_paths(self):
+        """
+        Precomputes the shortest paths between every pair of nodes,
+        and the output port of the first hop of every path leaving a switch.
+        """
+        self._rebuild_thread = None
+        self._apsp = dict(nx.all_pairs_shortest_path(self.network))
+        self._nh_port = {src: {dst: self._out_port[(src, path[1])] for dst, path in paths.items() if len(path) >= 2}
+                         for src, paths in self._apsp.items() if src in self.datapaths}
+        self.logger.debug("Shortest paths rebuilt for %d nodes", len(self._apsp))
+        self.preinstall_host_flows()
+
+    def preinstall_host_flows(self, dpids=None):
+        """
+        Installs one permanent IPv4 rule per (switch, known host) from the next-hop table,
+        so steady-state traffic towards known hosts never reaches the controller.
+        Only new or changed rules are sent, rules towards hosts that are no longer reachable
+        are deleted, and switches where this controller is SLAVE are skipped.
+
+        Args:
+            dpids (iterable): Switches to program, all the switches of the next-hop table if None.
+        """
+        if dpids is None:
+            dpids = list(self._nh_port)
+        hosts = [node for node, data in self.network.nodes(data=True) if data.get('type') == self.HOST_TYPE]
+        mods_by_dp = defaultdict(list)
+        for dpid in dpids:
+            dp = self.datapaths.get(dpid)
+            next_hops = self._nh_port.get(dpid)
+            if dp is None or next_hops is None or self.switches_roles.get(dpid, 'EQUAL') == 'SLAVE':
+                continue
+            ofproto = dp.ofproto
+            parser = dp.ofproto_parser
+            installed = self._proactive.setdefault(dpid, {})
+            wanted = {host_ip: next_hops[host_ip] for host_ip in hosts if host_ip in next_hops}
+
+            # Same match and priority, so a changed port replaces the previous rule
+            for host_ip, out_port in wanted.items():
+                if installed.get(host_ip) == out_port:
+                    continue
+                match = parser.OFPMatch(eth_type=ether_types.ETH_TYPE_IP, ipv4_dst=host_ip)
+                actions = [parser.OFPActionOutput(out_port)]
+                mods_by_dp[dp].append(self.build_flow_mod(dp=dp, table=self.DEFAULT_TABLE, priority=self.MEDIUM_PRIORITY,
+                                                          match=match, actions=actions))
+                installed[host_ip] = out_port
+
+            for host_ip in [host_ip for host_ip in installed if host_ip not in wanted]:
+                match = parser.OFPMatch(eth_type=ether_types.ETH_TYPE_IP, ipv4_dst=host_ip)
+                mods_by_dp[dp].append(parser.OFPFlowMod(datapath=dp, table_id=self.DEFAULT_TABLE,
+                                                        command=ofproto.OFPFC_DELETE_STRICT,
+                                                        priority=self.MEDIUM_PRIORITY, match=match,
+                                                        out_port=ofproto.OFPP_ANY, out_group=ofproto.OFPG_ANY))
+                del installed[host_ip]
+
+        self.install_flows_batch(mods_by_dp)
+
+    def _find_path(self, src, dst):
+        """
+        Returns the shortest path between two nodes, served from the all-pairs table.
+        Falls back to an on-demand search while the table is being rebuilt.
+
+        Returns:
+            list: Nodes of the path, or None if there is no path.
+        """
+        if self._apsp:
+            return self._apsp.get(src, {}).get(dst)
+        return self._bfs(src, dst)
+
+    def _bfs(self, src, dst):
+        """
+        Bidirectional breadth-first search over the flat adjacency dict.
+        The smaller frontier is expanded first and only the src -> dst path is rebuilt.
+        Links and hosts are always added in both directions, so _adj also gives the predecessors.
+
+        Returns:
+            list: Nodes of the shortest path, or None if there is no path.
+        """
+        if src not in self._adj or dst not in self._adj:
+            return None
+        if src == dst:
+            return [src]
+
+        pred = {src: None}
+        succ = {dst: None}
+        forward, backward = [src], [dst]
+        meet = None
+        while forward and backward and meet is None:
+            if len(forward) <= len(backward):
+                frontier, forward = forward, []
+                seen, other, nextlevel = pred, succ, forward
+            else:
+                frontier, backward = backward, []
+                seen, other, nextlevel = succ, pred, backward
+            for node in frontier:
+                for neighbor in self._adj[node]:
+                    if neighbor not in seen:
+                        seen[neighbor] = node
+                        nextlevel.append(neighbor)
+                    if neighbor in other:
+                        meet = neighbor
+                        break
+                if meet is not None:
+                    break
+        if meet is None:
+            return None
+
+        # Rebuild the path from both sets of parent pointers
+        path = []
+        node = meet
+        while node is not None:
+            path.append(node)
+            node = pred[node]
+        path.reverse()
+        node = succ[meet]
+        while node is not None:
+            path.append(node)
+            node = succ[node]
+        return path
+
+    def get_out_port(self, dpid, dst_ip):
+        """
+        Returns the output port towards dst_ip on switch dpid, read from the next-hop table.
+        While the table is being rebuilt, the path is searched on demand.
+
+        Args:
+            dpid (int): Datapath ID of the switch that received the packet.
+            dst_ip (str): Destination IP address.
+
+        Returns:
+            int: Output port, or None if no path is known.
+        """
+        if self._nh_port:
+            return self._nh_port.get(dpid, {}).get(dst_ip)
+
+        shortest_path = self._find_path(dpid, dst_ip)
+        if shortest_path and len(shortest_path) >= 2:
+            return self._out_port.get((dpid, shortest_path[1]))
+        return None
+
+    def _node_str(self, node):
+        """
+        Returns the display name of a node of the network graph.
+
+        Args:
+            node (int | str): DPID of a switch or IP address of a host.
+
+        Returns:
+            str: The name stored when the switch or host was added, 's<dpid>' or 'h<ip>'.
+        """
+        name = self.network.nodes.get(node, {}).get('name')
+        if name is not None:
+            return name
+        # Nodes created implicitly by an edge have no name
+        node_str = str(node)
+        # If the name includes a dot, it is an IP address, thus a host
+        if '.' in node_str:
+            return f"h{node_str}"
+        return f"s{node_str}"
 
     def monitor(self):
+        # Only the links added or removed since the previous tick are logged
+        last_edges = set()
         while True:
-            self.logger.info("Printing topology information")
-            for node1, node2, data in self.network.edges(data=True):
-                node1_str = str(node1)
-                node2_str = str(node2)
-                # If the name includes a dot, it is an IP address, thus a host
-                if '.' in node1_str:
-                    node1_str = f"h{node1_str}"
-                else:
-                    node1_str = f"s{node1_str}"
-                if '.' in node2_str:
-                    node2_str = f"h{node2_str}"
-                else:
-                    node2_str = f"s{node2_str}"
-                self.logger.info(f"{node1_str}-eth{data['src_port']} --> {node2_str}-eth{data['dst_port']}")
+            current = {(node1, data['src_port'], node2, data['dst_port'])
+                       for node1, node2, data in self.network.edges(data=True)}
+            added = current - last_edges
+            removed = last_edges - current
+            if added or removed:
+                # The whole snapshot is written as a single record
+                lines = [f"{self._node_str(node1)}-eth{src_port} --> {self._node_str(node2)}-eth{dst_port}"
+                         for node1, src_port, node2, dst_port in added]
+                lines += [f"Removed {self._node_str(node1)}-eth{src_port} --> {self._node_str(node2)}-eth{dst_port}"
+                          for node1, src_port, node2, dst_port in removed]
+                self.logger.info("Printing topology changes\n%s", "\n".join(lines))
+            last_edges = current
             hub.sleep(self.MONITOR_PERIOD)
 
-    def add_flow(self, dp, table, priority, match, actions=None, buffer_id=None, i_tout=0, h_tout=0):
+    def build_flow_mod(self, dp, table, priority, match, actions=None, buffer_id=None, i_tout=0, h_tout=0):
         ofproto = dp.ofproto
         parser = dp.ofproto_parser
 
@@ -133,26 +375,147 @@ class Controller(app_manager.RyuApp):
             mod = parser.OFPFlowMod(datapath=dp, priority=priority,
                                     match=match, instructions=inst, table_id=table,
                                     idle_timeout=i_tout, hard_timeout=h_tout)
+        return mod
 
+    def add_flow(self, dp, table, priority, match, actions=None, buffer_id=None, i_tout=0, h_tout=0):
+        mod = self.build_flow_mod(dp, table, priority, match, actions, buffer_id, i_tout, h_tout)
         dp.send_msg(mod)
 
+    def install_flows_batch(self, mods_by_dp):
+        """
+        Sends the FlowMods of each datapath back-to-back, followed by a single barrier.
+
+        Args:
+            mods_by_dp (dict): Map of {datapath: [OFPFlowMod, ...]}.
+        """
+        for dp, mods in mods_by_dp.items():
+            for mod in mods:
+                dp.send_msg(mod)
+            dp.send_msg(dp.ofproto_parser.OFPBarrierRequest(dp))
+
+    def build_match(self, parser, ethertype, src_ip, dst_ip):
+        """
+        Builds the OFPMatch of a (src_ip, dst_ip) flow for ARP or IPv4 traffic.
+        """
+        if ethertype == ether_types.ETH_TYPE_ARP:
+            return parser.OFPMatch(eth_type=ethertype, arp_spa=src_ip, arp_tpa=dst_ip)
+        return parser.OFPMatch(eth_type=ethertype, ipv4_src=src_ip, ipv4_dst=dst_ip)
+
+    def install_path_flows(self, parser, ethertype, src_ip, dst_ip):
+        """
+        Installs the flows of a host-to-host path in both directions.
+        Switches where this controller is SLAVE are skipped, their MASTER programs them.
+
+        Args:
+            parser: OpenFlow parser, shared by all switches since only OF 1.3 is spoken.
+            ethertype (int): ARP or IPv4 ethertype of the flow.
+            src_ip (str): Source host IP address.
+            dst_ip (str): Destination host IP address.
+
+        Returns:
+            set: DPIDs programmed for the src_ip -> dst_ip direction.
+        """
+        programmed = set()
+        mods_by_dp = defaultdict(list)
+        path = self._find_path(src_ip, dst_ip)
+        if not path or len(path) < 3:
+            return programmed
+
+        directions = ((path, src_ip, dst_ip, programmed), (path[::-1], dst_ip, src_ip, set()))
+        for nodes, flow_src, flow_dst, done in directions:
+            # The ingress switch matches the full flow. IPv4 transit switches only match
+            # the destination, so one rule per destination is shared by all sources
+            ingress_match = self.build_match(parser, ethertype, flow_src, flow_dst)
+            if ethertype == ether_types.ETH_TYPE_IP:
+                transit_match = parser.OFPMatch(eth_type=ethertype, ipv4_dst=flow_dst)
+                transit_priority = self.MEDIUM_PRIORITY
+            else:
+                transit_match = ingress_match
+                transit_priority = self.HIGH_PRIORITY
+
+            # Every node between the two hosts is a switch
+            for idx in range(1, len(nodes) - 1):
+                sw = nodes[idx]
+                if sw not in self.datapaths or self.switches_roles.get(sw, 'EQUAL') == 'SLAVE':
+                    continue
+                dp = self.datapaths[sw]
+                out_port = self._out_port[(sw, nodes[idx + 1])]
+                actions = [parser.OFPActionOutput(out_port)]
+                if idx == 1:
+                    match, priority = ingress_match, self.HIGH_PRIORITY
+                else:
+                    # Do not replace a permanent destination rule by one with an idle timeout
+                    if transit_priority == self.MEDIUM_PRIORITY and self._proactive.get(sw, {}).get(flow_dst) == out_port:
+                        done.add(sw)
+                        continue
+                    match, priority = transit_match, transit_priority
+                mods_by_dp[dp].append(self.build_flow_mod(dp=dp, table=self.DEFAULT_TABLE, priority=priority,
+                                                          match=match, actions=actions, i_tout=10))
+                done.add(sw)
+
+        self.install_flows_batch(mods_by_dp)
+        return programmed
+
+    def _claim_flow(self, src_ip, dst_ip):
+        """
+        Deduplicates bursts of PacketIns for the same flow raised along its path.
+
+        Returns:
+            bool: True if the caller must install the flow, False if another
+            PacketIn installed it less than INFLIGHT_WINDOW seconds ago.
+        """
+        key = (src_ip, dst_ip)
+        now = time.time()
+        last = self._inflight.get(key)
+        if last is not None and now - last < self.INFLIGHT_WINDOW:
+            return False
+
+        self._inflight[key] = now
+        hub.spawn_after(2 * self.INFLIGHT_WINDOW, self._expire_claim, key, now)
+        return True
+
+    def _expire_claim(self, key, claimed_at):
+        """
+        Forgets an in-flight flow, unless it was claimed again after claimed_at.
+        """
+        if self._inflight.get(key) == claimed_at:
+            del self._inflight[key]
+
+    def _parse_addresses(self, raw):
+        """
+        Extracts the ARP or IPv4 addresses of a frame with the ryu packet library.
+
+        Returns:
+            tuple: (ethertype, src_ip, dst_ip), or None for other protocols.
+        """
+        try:
+            pkt_in = packet.Packet(raw)
+        except Exception:
+            return None
+
+        # Single walk over the decoded headers, the L3 header follows the Ethernet/VLAN ones
+        for header in pkt_in.protocols:
+            if isinstance(header, arp.arp):
+                return ether_types.ETH_TYPE_ARP, header.src_ip, header.dst_ip
+            if isinstance(header, ipv4.ipv4):
+                return ether_types.ETH_TYPE_IP, header.src, header.dst
+        return None
+
     # Function to handle packet in events
     @set_ev_cls(ofp_event.EventOFPPacketIn, MAIN_DISPATCHER)
     def packet_in_handler(self, ev):
         # Extracts switch info
-        dp = ev.msg.datapath
-        datapath = ev.msg.datapath
+        msg = ev.msg
+        dp = datapath = msg.datapath
         dpid = dp.id
-        in_port = ev.msg.match['in_port']
+        in_port = msg.match['in_port']
         # Extracts OF handlers
-        ofproto = dp.ofproto
         parser = dp.ofproto_parser
-        # Extracts the packet
-        pkt_in = packet.Packet(ev.msg.data)
-        eth_header = pkt_in.get_protocols(ethernet.ethernet)[0]
-        dst_mac = eth_header.dst
-        src_mac = eth_header.src
-        ethertype = eth_header.ethertype
+        # Extracts the Ethernet header straight from the raw frame
+        raw = msg.data
+        if len(raw) < self.ETH_HEADER_LEN:
+            return
+        dst_mac, src_mac, ethertype = struct.unpack_from('!6s6sH', raw)
 
         # LLDP packets are ignored
         if ethertype == ether_types.ETH_TYPE_LLDP:
@@ -163,49 +526,53 @@ class Controller(app_manager.RyuApp):
             return
 
         self.packet_in_count += 1
-        self.logger.info(f"PacketIn s{dpid}: {src_mac} → {dst_mac}")
+        # Per-packet log, the MACs are only formatted if it is emitted
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("PacketIn s%s: %s → %s", dpid, src_mac.hex(':'), dst_mac.hex(':'))
         
+        # Untagged ARP and IPv4 addresses are read at fixed offsets, truncated frames are ignored
         if ethertype == ether_types.ETH_TYPE_ARP:
-            arp_header = pkt_in.get_protocols(arp.arp)[0]
-            src_ip = arp_header.src_ip
-            dst_ip = arp_header.dst_ip        
+            if len(raw) < self.ARP_FRAME_LEN:
+                return
+            src_ip = socket.inet_ntoa(raw[28:32])
+            dst_ip = socket.inet_ntoa(raw[38:42])
         elif ethertype == ether_types.ETH_TYPE_IP:
-            ip_header = pkt_in.get_protocols(ipv4.ipv4)[0]
-            src_ip = ip_header.src
-            dst_ip = ip_header.dst
+            if len(raw) < self.IPV4_FRAME_LEN:
+                return
+            src_ip = socket.inet_ntoa(raw[26:30])
+            dst_ip = socket.inet_ntoa(raw[30:34])
+        elif ethertype == ether_types.ETH_TYPE_8021Q:
+            # VLAN tagged frames go through the full ryu parser
+            parsed = self._parse_addresses(raw)
+            if parsed is None:
+                return
+            ethertype, src_ip, dst_ip = parsed
         else:
+            # Other protocols (e.g. IPv6 ND/MLD) are ignored
             return
+        # If the destination is known in the graph, use the (cached) shortest path
         # Default output port is FLOOD
-        out_port = datapath.ofproto.OFPP_FLOOD
-        
-        # If the destination is known in the graph, try to find the shortest path
-        if self.network.has_node(dpid) and self.network.has_node(dst_ip):
-            try:
-                shortest_path = nx.shortest_path(self.network, source=dpid, target=dst_ip)
-                if len(shortest_path) >= 2:
-                    next_hop = shortest_path[1]
-                    out_port = self.network[dpid][next_hop]['src_port']
-            except (nx.NetworkXNoPath, KeyError):
-                out_port = datapath.ofproto.OFPP_FLOOD
+        out_port = self.get_out_port(dpid, dst_ip)
+        if out_port is None:
+            out_port = self.OFPP_FLOOD
         
         actions = [parser.OFPActionOutput(out_port)]
         
-        # Install flow if the destination IP is known
-        if out_port != datapath.ofproto.OFPP_FLOOD:
-            if ethertype == ether_types.ETH_TYPE_ARP:
-                match = parser.OFPMatch(eth_type=ethertype, arp_spa=src_ip, arp_tpa=dst_ip)
-            else:
-                match = parser.OFPMatch(eth_type=ethertype, ipv4_src=src_ip, ipv4_dst=dst_ip)
-            
-            self.add_flow(dp=datapath, table=self.DEFAULT_TABLE, priority=self.HIGH_PRIORITY, 
-                        match=match, actions=actions, i_tout=10)
+        # Install flows if the destination IP is known and not being installed already
+        if out_port != self.OFPP_FLOOD and self._claim_flow(src_ip, dst_ip):
+            # Whole path in both directions, so the reply does not raise another PacketIn
+            programmed = self.install_path_flows(parser, ethertype, src_ip, dst_ip)
+            if dpid not in programmed:
+                match = self.build_match(parser, ethertype, src_ip, dst_ip)
+                self.add_flow(dp=datapath, table=self.DEFAULT_TABLE, priority=self.HIGH_PRIORITY, 
+                            match=match, actions=actions, i_tout=10)
 
         # Send the packet out
         data = None
-        if ev.msg.buffer_id == datapath.ofproto.OFP_NO_BUFFER:
-            data = ev.msg.data
+        if msg.buffer_id == self.OFP_NO_BUFFER:
+            data = raw
 
-        out = parser.OFPPacketOut(datapath=datapath, buffer_id=ev.msg.buffer_id,
+        out = parser.OFPPacketOut(datapath=datapath, buffer_id=msg.buffer_id,
                                 in_port=in_port, actions=actions, data=data)
         datapath.send_msg(out)
 
@@ -216,6 +583,8 @@ class Controller(app_manager.RyuApp):
 
         if ev.state == DEAD_DISPATCHER:
             if dpid in self.datapaths: del self.datapaths[dpid]
+            # Preinstalled rules are sent again if the switch reconnects
+            self._proactive.pop(dpid, None)
             return
 
         self.datapaths[dpid] = datapath
@@ -235,7 +604,12 @@ class Controller(app_manager.RyuApp):
         datapath.send_msg(req_async)
         
         # B. DEFAULT ROLE: SLAVE
-        self.switches_roles[dpid] = "SLAVE"
+        # A switch that reconnects gets back the role last assigned by the balancer,
+        # which only sends role changes
+        if dpid in self._role_gen:
+            self.set_role(dpid, self.switches_roles[dpid], self._role_gen[dpid])
+        else:
+            self.switches_roles[dpid] = "SLAVE"
 
     def set_role(self, dpid, role_str, gen_id):
         if dpid not in self.datapaths: return False
@@ -245,10 +619,17 @@ class Controller(app_manager.RyuApp):
         parser = dp.ofproto_parser
 
         self.switches_roles[dpid] = role_str.upper()
+        self._role_gen[dpid] = gen_id
         
         role_of = ofp.OFPCR_ROLE_MASTER if role_str.upper() == 'MASTER' else ofp.OFPCR_ROLE_SLAVE
         req = parser.OFPRoleRequest(dp, role=role_of, generation_id=gen_id)
         dp.send_msg(req)
+
+        # A new MASTER programs the preinstalled rules right away, a SLAVE leaves them to its MASTER
+        if role_of == ofp.OFPCR_ROLE_MASTER:
+            self.preinstall_host_flows([dpid])
+        else:
+            self._proactive.pop(dpid, None)
         
-        self.logger.info(f"Role updated for s{dpid}: {role_str}")
+        self.logger.info("Role updated for s%s: %s", dpid, role_str)
         return True
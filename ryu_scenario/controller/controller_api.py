@@ -68,6 +68,53 @@ class RestAPI(ControllerBase):
             return Response(status=404, body="Switch not found")
         
 
+    @route('roles_bulk', '/roles', methods=['POST'])
+    def set_roles_bulk(self, req, **kwargs):
+        """
+        Updates the OpenFlow role (MASTER/SLAVE) of several switches in a single request.
+
+        Expects a JSON body with:
+            - assignments (dict): Map of {dpid: role}, role being 'MASTER' or 'SLAVE'.
+            - generation_id (int, optional): The generation ID shared by all role requests.
+
+        Args:
+            req: The HTTP request object containing the JSON body.
+
+        Returns:
+            Response:
+                - 200 OK: A JSON response containing:
+                    - updated (list): DPIDs whose role was updated.
+                    - not_found (list): DPIDs that are not connected.
+                - 400 Bad Request: If the body does not contain valid role assignments,
+                  or a role other than MASTER or SLAVE. No role is applied in that case.
+        """
+        try:
+            data = json.loads(req.body)
+            gen_id = int(data.get('generation_id', 0))
+            assignments = [(int(dpid), role.upper()) for dpid, role in data['assignments'].items()]
+        except (ValueError, TypeError, KeyError, AttributeError):
+            return Response(status=400, body="Invalid role assignments")
+        # Every role is checked before any of them is applied
+        if any(role_str not in ('MASTER', 'SLAVE') for _, role_str in assignments):
+            return Response(status=400, body="Roles must be MASTER or SLAVE")
+
+        updated = []
+        not_found = []
+        for dpid, role_str in assignments:
+            if self.app.set_role(dpid, role_str, gen_id):
+                updated.append(dpid)
+            else:
+                not_found.append(dpid)
+
+        body = {
+            'updated': updated,
+            'not_found': not_found
+        }
+        return Response(
+            content_type='application/json',
+            body=json.dumps(body)
+        )
+
     @route('roles', '/roles', methods=['GET'])
     def get_roles(self, req, **kwargs):
         """
@@ -111,31 +158,31 @@ class RestAPI(ControllerBase):
         Returns:
             Response: A JSON response containing 'nodes' and 'edges' lists.
         """
-        # Extract the nodes
-        nodes = []
-        for node_id, data in self.app.network.nodes(data=True):
-            nodes.append({
-                'id': node_id,
-                'label': data.get('name', str(node_id)),
-                'group': data.get('type', 'switch')
-            })
-
-        # Extract the edges
-        edges = []
-        for src, dst in self.app.network.edges():
-            edges.append({
-                'from': src,
-                'to': dst
-            })
-
-        body = {
-            'nodes': nodes,
-            'edges': edges
-        }
+        # The body only changes with the topology, it is rebuilt after each change
+        if self.app.topology_body is None:
+            self.app.topology_body = self._build_topology_body()
 
         return Response(
             content_type='application/json',
             headers={'Access-Control-Allow-Origin': '*'},
-            body=json.dumps(body)
+            body=self.app.topology_body
         )
 
+    def _build_topology_body(self):
+        """
+        Serializes the nodes and edges of the network graph.
+
+        Returns:
+            str: JSON document with 'nodes' and 'edges' lists.
+        """
+        graph = self.app.network
+        nodes = [{'id': node_id, 'label': data.get('name', str(node_id)), 'group': data.get('type', 'switch')}
+                 for node_id, data in graph.nodes(data=True)]
+        edges = [{'from': src, 'to': dst}
+                 for src, neighbors in graph.adj.items() for dst in neighbors]
+
+        body = {
+            'nodes': nodes,
+            'edges': edges
+        }
+        return json.dumps(body)
@@ -1,9 +1,14 @@
 import threading
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
 import time
 import docker
 import sys
 import subprocess
+import bisect
+import heapq
+import json
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from BaseLogger import BaseLogger
@@ -29,22 +34,53 @@ class RyuLoadBalancer(BaseLogger):
         self.TARGET_LOAD_PER_CONTROLLER = 50    # Avg PPS threshold to scale UP
         self.MIN_LOAD_PER_CONTROLLER = 15       # Avg PPS threshold to scale DOWN
         self.current_avg_load = 0               # Current average load per controller
+        self.LOAD_EWMA_ALPHA = 0.3              # Weight of the newest sample in the smoothed load
+        self.SCALE_CONFIRM_SAMPLES = 3          # Consecutive smoothed samples past a threshold needed to scale
+        self.smoothed_load = 0                  # EWMA of current_avg_load, used for scaling decisions
+        self._smoothed_active = 0               # Number of controllers the smoothed load was computed for
+        self._over_count = 0                    # Consecutive samples above TARGET_LOAD_PER_CONTROLLER
+        self._under_count = 0                   # Consecutive samples below MIN_LOAD_PER_CONTROLLER
         self.current_rates = {}                 # Current packet rates per controller
         self.previous_metrics = {}              # Previous packet counts per controller
         self.last_scale_action_time = 0         # Timestamp of last scaling action
 
         # Timers
-        self.CHECK_INTERVAL = 1                 # How often to check metrics
+        self.CHECK_INTERVAL = 1                 # How often to check metrics when the load is near a threshold
+        self.MAX_CHECK_INTERVAL = 3             # How often to check metrics when the load is stable
         self.WARMUP_TIME = 5                    # Time to wait for a new controller to learn topology
         self.COOLDOWN_TIME = 10                 # Time to wait after a scaling action before checking again
+        self.STOP_TIMEOUT = 2                   # Seconds Docker waits after SIGTERM before killing a controller
+        self.EVENTS_RECONNECT_DELAY = 2         # Seconds before reopening a lost Docker event stream
+        self.SWITCHES_CACHE_TTL = 2             # How long the OVS bridge list is reused
 
         # Global State
         self.active_controllers = set()         # Set of active controller IDs
+        self.sorted_controllers = []            # Active controller IDs kept in ascending order
+        self._free_ids = []                     # Min-heap of IDs released by removed controllers
+        self._controllers_lock = threading.Lock()  # Keeps the set and the sorted list consistent across threads
         self.docker_client = docker.from_env()  # Docker client instance
+        self.docker_api = self.docker_client.api  # Low-level client, one daemon call per container operation
+        self._host_config = self.docker_api.create_host_config(network_mode="host")  # Shared by every controller container
+        self._containers = {}                   # Container ID of each controller started by this balancer
+        self._stopping = set()                  # Controllers being stopped by the balancer itself
+        self._exited = set()                    # Active controllers whose container exited, see _watch_docker_events
+
+        # HTTP
+        self.http = requests.Session()          # Keep-alive HTTP session shared by all controllers
+        self.http.mount("http://", HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=0))
+        self._endpoints = {}                    # Prebuilt REST URLs per controller
+        self.METRICS_TIMEOUT = 0.5              # Timeout of a /metrics poll
+        self.http_pool = ThreadPoolExecutor(max_workers=self.MAX_CONTROLLERS)  # Parallel requests to controllers
+
+        # OVS
+        self._switches_cache = {'t': 0.0, 'v': []}  # Last 'ovs-vsctl list-br' result and its timestamp
+        self._ovs_targets = (None, [])          # (active controllers, OpenFlow targets) of the last update
 
         self.CURRENT_GEN_ID = 0                 # Generation ID for role requests
+        self._sent_roles = {}                   # Roles each controller acknowledged: {controller_id: {dpid: role}}
         self.is_scaling = False                 # Flag indicating if a scaling action is in progress
         self.start_time = time.time()           # Timestamp when the balancer started
+        self._wake = threading.Event()          # Set to run the next metrics check immediately
         
         # GUI
         self.monitoring_active = False          # Flag to start monitoring loop
@@ -57,16 +93,30 @@ class RyuLoadBalancer(BaseLogger):
     def get_all_switches(self):
         """
         Retrieves the list of active switches from the OVS system.
+        The result is cached for SWITCHES_CACHE_TTL seconds.
         
         Returns:
             list: List of strings representing switch names.
         """
+        now = time.monotonic()
+        if now - self._switches_cache['t'] < self.SWITCHES_CACHE_TTL:
+            return self._switches_cache['v']
+
         try:
             result = subprocess.check_output(["ovs-vsctl", "list-br"], text=True)
-            return [line.strip() for line in result.splitlines() if line.strip()]
+            switches = [line.strip() for line in result.splitlines() if line.strip()]
         except:
             return []
 
+        self._switches_cache.update(t=now, v=switches)
+        return switches
+
+    def invalidate_switches_cache(self):
+        """
+        Forces the next get_all_switches call to query OVS, used when bridges are added or removed.
+        """
+        self._switches_cache['t'] = 0.0
+
     def update_ovs_connections(self):
         """
         Updates the OVS configuration to connect every switch to all active controllers.
@@ -75,33 +125,29 @@ class RyuLoadBalancer(BaseLogger):
         if not switches:
             return
 
-        if not self.active_controllers:
-            cmd_type = "del-controller"
-            target_str = ""
-        else:
-            cmd_type = "set-controller"
-            targets = []
-            for i in sorted(list(self.active_controllers)):
-                port = self.BASE_OFP_PORT + i
-                targets.append(f"tcp:127.0.0.1:{port}")
-            target_str = " ".join(targets)
-
-        # Apply configuration to each switch
+        # Controller targets only change when the set of active controllers does
+        key = frozenset(self.active_controllers)
+        if self._ovs_targets[0] != key:
+            self._ovs_targets = (key, [f"tcp:127.0.0.1:{self.BASE_OFP_PORT + i}" for i in sorted(key)])
+        targets = self._ovs_targets[1]
+
+        # Apply configuration to every switch in a single ovsdb transaction
+        cmd = ["ovs-vsctl", "--timeout=5"]
         for sw in switches:
-            if target_str:
-                cmd = f"ovs-vsctl --timeout=5 set bridge {sw} protocols=OpenFlow13 && " \
-                    f"ovs-vsctl --timeout=5 {cmd_type} {sw} {target_str}"
+            if targets:
+                cmd += ["--", "set", "bridge", sw, "protocols=OpenFlow13",
+                        "--", "set-controller", sw, *targets]
             else:
-                cmd = f"ovs-vsctl --timeout=5 {cmd_type} {sw}"
-                
-            subprocess.run(cmd, shell=True)
+                cmd += ["--", "del-controller", sw]
+
+        subprocess.run(cmd, check=False)
 
     # --- DOCKER FUNCTIONS ---
 
     def start_controller(self,controller_ID):
         """
         Starts a new Ryu controller Docker container.
-        Removes any existing container with the same ID and launches a new one.
+        If a container with the same name already exists, it is removed and the creation retried.
         
         Args:
             controller_ID (int): Unique identifier for the controller instance.
@@ -114,26 +160,32 @@ class RyuLoadBalancer(BaseLogger):
         ws_port = self.BASE_WS_PORT + controller_ID
         ofp_port = self.BASE_OFP_PORT + controller_ID
         try:
-            # Remove old container if exists
+            command = [
+                "ryu-manager","controller.py",
+                "--ofp-tcp-listen-port", str(ofp_port),
+                "--wsapi-port", str(ws_port),
+                "--observe-links"
+            ]
+            # Create new container, an old one with the same name is only removed on conflict
             try:
-                old = self.docker_client.containers.get(name)
-                old.remove(force=True)
-            except: pass
-            
-            # Run new container
-            self.docker_client.containers.run(
-                image=self.IMAGE_NAME,
-                name=name,
-                detach=True,
-                network="host",
-                command=[
-                    "ryu-manager","controller.py",
-                    "--ofp-tcp-listen-port", str(ofp_port),
-                    "--wsapi-port", str(ws_port),
-                    "--observe-links"
-                ]
-            )
-            self.active_controllers.add(controller_ID)
+                created = self.docker_api.create_container(image=self.IMAGE_NAME, name=name,
+                                                           command=command, host_config=self._host_config)
+            except docker.errors.APIError as e:
+                if e.status_code != 409:
+                    raise
+                self.docker_api.remove_container(name, force=True)
+                created = self.docker_api.create_container(image=self.IMAGE_NAME, name=name,
+                                                           command=command, host_config=self._host_config)
+            self.docker_api.start(created['Id'])
+            self._containers[controller_ID] = created['Id']
+            self._exited.discard(controller_ID)
+            base_url = f"http://localhost:{ws_port}"
+            self._endpoints[controller_ID] = {
+                'metrics': f"{base_url}/metrics",
+                'role': f"{base_url}/role",
+                'roles': f"{base_url}/roles"
+            }
+            self._activate(controller_ID)
             self.logger.info(f" [DOCKER] Created {name} | OFP_PORT: {ofp_port} | WS_PORT: {ws_port}")
             return True
         
@@ -149,31 +201,122 @@ class RyuLoadBalancer(BaseLogger):
             controller_ID (int): Unique identifier for the controller instance.
         """
         name = f"ryu_{controller_ID}"
+        self._stopping.add(controller_ID)
         try:
-            c = self.docker_client.containers.get(name)
-            c.stop()
-            c.remove()
-            if controller_ID in self.active_controllers:
-                self.active_controllers.discard(controller_ID)
+            # The daemon also accepts the container name
+            container = self._containers.pop(controller_ID, name)
+            self.docker_api.stop(container, timeout=self.STOP_TIMEOUT)
+            self.docker_api.remove_container(container)
                 
             self.logger.info(f" [DOCKER] Deleted {name}")
             
         except Exception as e:
             self.logger.error(f" [ERROR] Stopping {name}: {e}")
 
-        self.active_controllers.discard(controller_ID)
+        self._deactivate(controller_ID)
+        # A reused ID must not inherit the rate baseline of the stopped container
+        self._endpoints.pop(controller_ID, None)
+        self._sent_roles.pop(controller_ID, None)
+        self.previous_metrics.pop(controller_ID, None)
+        self._exited.discard(controller_ID)
+        self._stopping.discard(controller_ID)
+        self._release_id(controller_ID)
+
+    def _watch_docker_events(self):
+        """
+        Follows the Docker event stream and flags controllers whose container exited
+        without being stopped by the balancer, so failover does not wait for a /metrics timeout.
+        The stream is reopened after EVENTS_RECONNECT_DELAY seconds if it fails or the daemon restarts,
+        replaying the events emitted since it was lost.
+        """
+        since = None
+        while True:
+            try:
+                events = self.docker_client.events(since=since, decode=True, filters={'type': 'container', 'event': 'die'})
+                for event in events:
+                    name = event.get('Actor', {}).get('Attributes', {}).get('name', '')
+                    if not name.startswith('ryu_'):
+                        continue
+                    try:
+                        controller_ID = int(name[len('ryu_'):])
+                    except ValueError:
+                        continue
+
+                    # A replayed event may belong to an older container of a reused ID
+                    if event.get('id') != self._containers.get(controller_ID, event.get('id')):
+                        continue
+
+                    if controller_ID in self.active_controllers and controller_ID not in self._stopping:
+                        self.logger.warning(f" [DOCKER] {name} exited unexpectedly")
+                        self._exited.add(controller_ID)
+                        self.notify()
+
+                self.logger.warning(f" [DOCKER] Event stream ended, reconnecting in {self.EVENTS_RECONNECT_DELAY}s")
+            except Exception as e:
+                self.logger.error(f" [ERROR] Docker event stream closed: {e}, reconnecting in {self.EVENTS_RECONNECT_DELAY}s")
+
+            since = int(time.time())
+            time.sleep(self.EVENTS_RECONNECT_DELAY)
+
+    def _activate(self, controller_ID):
+        """
+        Adds a controller to the active set and to the sorted list.
+        """
+        with self._controllers_lock:
+            if controller_ID not in self.active_controllers:
+                self.active_controllers.add(controller_ID)
+                bisect.insort(self.sorted_controllers, controller_ID)
+
+    def _deactivate(self, controller_ID):
+        """
+        Removes a controller from the active set and from the sorted list.
+        """
+        with self._controllers_lock:
+            if controller_ID in self.active_controllers:
+                self.active_controllers.discard(controller_ID)
+                self.sorted_controllers.remove(controller_ID)
+
+    def _release_id(self, controller_ID):
+        """
+        Makes the ID (and ports) of a removed controller available to the next scale up.
+        """
+        with self._controllers_lock:
+            if controller_ID not in self._free_ids:
+                heapq.heappush(self._free_ids, controller_ID)
+
+    def _next_controller_id(self):
+        """
+        Returns the lowest released ID, or the one after the highest active ID.
+        """
+        with self._controllers_lock:
+            while self._free_ids:
+                controller_ID = heapq.heappop(self._free_ids)
+                if controller_ID not in self.active_controllers:
+                    return controller_ID
+            return self.sorted_controllers[-1] + 1 if self.sorted_controllers else 0
+
+    def clear_controllers(self):
+        """
+        Forgets every active controller.
+        """
+        with self._controllers_lock:
+            self.active_controllers.clear()
+            self.sorted_controllers.clear()
+            self._free_ids.clear()
 
     def cleanup(self):
         """
         Stops and removes all active controller containers upon program exit.
         """
         self.logger.info(" [DOCKER] Cleaning up containers...")
-        for i in list(self.active_controllers):
-            self.stop_controller(i)
+        controllers = list(self.active_controllers)
+        with ThreadPoolExecutor(max_workers=len(controllers) or 1) as pool:
+            list(pool.map(self.stop_controller, controllers))
+        self.http.close()
         sys.exit(0)
 
     # --- METRICS & SCALING LOGIC ---
-    
+
     def _fetch_pkt_in_count(self, controller_ID):
         """        
         Fetches the total number of Packet-In messages processed by a specific controller.       
@@ -184,14 +327,12 @@ class RyuLoadBalancer(BaseLogger):
         Returns:
             int: Value of 'packet_in_count' from the controller's /metrics endpoint.
         """
-        ws_port = self.BASE_WS_PORT + controller_ID
-        url = f"http://localhost:{ws_port}/metrics"
-        
         try:
-            r = requests.get(url, timeout=0.5).json()
-            return r.get('packet_in_count', 0)
+            url = self._endpoints[controller_ID]['metrics']
+            r = self.http.get(url, timeout=self.METRICS_TIMEOUT)
+            return json.loads(r.content).get('packet_in_count', 0)
         
-        except (requests.exceptions.RequestException, ValueError):
+        except (requests.exceptions.RequestException, ValueError, KeyError):
             return None
                 
     def _calculate_pps(self, controller_ID, current_count):
@@ -205,19 +346,20 @@ class RyuLoadBalancer(BaseLogger):
         Returns:
             float: Rate of packets per second.
         """
-        now = time.time()       
-        prev_time, prev_count = self.previous_metrics.get(controller_ID, (now - self.CHECK_INTERVAL, 0))
+        # Monotonic nanoseconds, so clock adjustments do not distort the rate
+        now = time.perf_counter_ns()
+        prev_time, prev_count = self.previous_metrics.get(controller_ID, (now - self.CHECK_INTERVAL * 1_000_000_000, 0))
         
         # Avoid division by zero
         time_delta = now - prev_time
-        if time_delta <= 0: time_delta = 0.001
+        if time_delta <= 0: time_delta = 1_000_000
         # Calculate packet delta
         packet_delta = current_count - prev_count
         if packet_delta < 0: packet_delta = current_count
         # Store current metrics for next calculation
         self.previous_metrics[controller_ID] = (now, current_count)
         
-        return round(packet_delta / time_delta, 2)
+        return round(packet_delta * 1_000_000_000 / time_delta, 2)
     
     def _handle_failover(self, dead_controllers):
         """
@@ -229,8 +371,11 @@ class RyuLoadBalancer(BaseLogger):
         if not dead_controllers: return
         
         for d_id in dead_controllers:
-            self.active_controllers.discard(d_id)
+            self._deactivate(d_id)
             self.previous_metrics.pop(d_id, None)
+            self._sent_roles.pop(d_id, None)
+            self._exited.discard(d_id)
+            self._release_id(d_id)
             
         self.update_ovs_connections()
         self.distribute_switches()
@@ -245,15 +390,26 @@ class RyuLoadBalancer(BaseLogger):
             total_new_packets (int): Sum of new packets across all controllers.
             individual_rates (dict): Map of {controller_id: rate}.
         """
+        if not self.active_controllers:
+            return 0, {}
+
         total_pps = 0
         controller_rates = {}
         dead_controllers = []
+
+        # Controllers whose container exited are dead without polling them
+        for c_id in self._exited & self.active_controllers:
+            dead_controllers.append(c_id)
+            controller_rates[c_id] = -1
         
-        # Poll each active controller
-        for c_id in list(self.active_controllers):
+        # Poll all active controllers in parallel
+        futures = {c_id: self.http_pool.submit(self._fetch_pkt_in_count, c_id)
+                   for c_id in list(self.active_controllers) if c_id not in controller_rates}
+
+        for c_id, future in futures.items():
             try:
                 # Extract the count of Packet-In messages from the controller
-                packet_count = self._fetch_pkt_in_count(c_id)
+                packet_count = future.result()
                 
                 # If controller is unreachable, mark as dead
                 if packet_count is None:
@@ -286,9 +442,11 @@ class RyuLoadBalancer(BaseLogger):
                 return
 
             # Calculate next available ID
-            new_id = max(self.active_controllers) + 1 if self.active_controllers else 0
+            new_id = self._next_controller_id()
 
-            if self.start_controller(new_id):
+            if not self.start_controller(new_id):
+                self._release_id(new_id)
+            else:
                 self.logger.debug("Updating OVS connections...")
                 self.update_ovs_connections()
                 
@@ -322,8 +480,8 @@ class RyuLoadBalancer(BaseLogger):
                 return
 
             # Select victim (Highest ID)
-            controller_id = max(self.active_controllers)
-            self.active_controllers.discard(controller_id)
+            controller_id = self.sorted_controllers[-1]
+            self._deactivate(controller_id)
             
             self.logger.debug(f"Reassigning switches from ryu_{controller_id} to others...")
             self.distribute_switches()
@@ -347,35 +505,111 @@ class RyuLoadBalancer(BaseLogger):
     def distribute_switches(self):
         """
         Assigns Master/Slave roles to controllers using Round Robin.
+        Only the roles that differ from the last ones each controller acknowledged are sent.
         """
-        self.CURRENT_GEN_ID += 1
-        
         switches = self.get_all_switches()
-        controllers = sorted(list(self.active_controllers))
+        controllers = list(self.sorted_controllers)
 
         if not controllers or not switches: return
         
-        self.logger.info(f" [INFO] Rebalancing {len(switches)} switches among {len(controllers)} controllers ---")
-
+        # Build the full role table {dpid: role} of every controller
+        assignments = {c_id: {} for c_id in controllers}
         for idx, sw in enumerate(switches):
             # Round Robin Logic
             assigned_controller = controllers[idx % len(controllers)]
         
-            dpid = int(sw.replace("s", ""))
+            # Bridges are named 's<dpid>' (see Topology.py)
+            dpid = int(sw[1:])
             
-            # Send Role Request to ALL active controllers for this switch
+            # Every active controller gets a role for this switch
             for c_id in controllers:
-                role = "MASTER" if c_id == assigned_controller else "SLAVE"
-                url = f"http://localhost:{self.BASE_WS_PORT + c_id}/role"
-                try:
-                    requests.post(url, json={
-                        "dpid": dpid,
-                        "role": role,
-                        "generation_id": self.CURRENT_GEN_ID
-                    }, timeout=1)
-                    
-                except requests.exceptions.RequestException as e:
-                    self.logger.info(f"Error assigning switch {sw} to controller ryu_{c_id}: {e}")
+                assignments[c_id][dpid] = "MASTER" if c_id == assigned_controller else "SLAVE"
+
+        # Keep only the changes
+        changes = {}
+        for c_id in controllers:
+            sent = self._sent_roles.get(c_id, {})
+            changed = {dpid: role for dpid, role in assignments[c_id].items() if sent.get(dpid) != role}
+            if changed:
+                changes[c_id] = changed
+
+        if not changes:
+            self.logger.debug("Switch roles unchanged, nothing to send")
+            return
+
+        self.CURRENT_GEN_ID += 1
+        self.logger.info(f" [INFO] Rebalancing {len(switches)} switches among {len(controllers)} controllers ---")
+
+        # Send one bulk Role Request per controller, all in parallel
+        futures = {}
+        for c_id, changed in changes.items():
+            url = self._endpoints.get(c_id, {}).get('roles')
+            if url is None:
+                self.logger.info(f"Error assigning switches to controller ryu_{c_id}: unknown endpoint")
+                continue
+            payload = {"generation_id": self.CURRENT_GEN_ID, "assignments": changed}
+            futures[c_id] = self.http_pool.submit(self.http.post, url, json=payload, timeout=1)
+
+        for c_id, future in futures.items():
+            try:
+                updated = future.result().json().get('updated', [])
+
+            except (requests.exceptions.RequestException, ValueError) as e:
+                self.logger.info(f"Error assigning switches to controller ryu_{c_id}: {e}")
+                continue
+
+            # Switches not yet connected to the controller are sent again next time
+            sent = self._sent_roles.setdefault(c_id, {})
+            for dpid in updated:
+                sent[dpid] = changes[c_id][dpid]
+
+    def _next_check_interval(self):
+        """
+        Computes how long to wait before the next metrics check.
+        The further the average load is from both scaling thresholds, the longer the wait.
+
+        Returns:
+            float: Seconds to wait, between CHECK_INTERVAL and MAX_CHECK_INTERVAL.
+        """
+        if not self.auto_mode:
+            return self.CHECK_INTERVAL
+
+        distance = min(abs(self.current_avg_load - self.TARGET_LOAD_PER_CONTROLLER),
+                       abs(self.current_avg_load - self.MIN_LOAD_PER_CONTROLLER))
+        interval = self.CHECK_INTERVAL * (1 + distance / self.TARGET_LOAD_PER_CONTROLLER)
+        return min(interval, self.MAX_CHECK_INTERVAL)
+
+    def _update_smoothed_load(self, num_active):
+        """
+        Folds the latest average load into its EWMA and counts how many samples in a row
+        are past each scaling threshold, so a single burst does not trigger a scaling action.
+
+        Args:
+            num_active (int): Number of active controllers the average load was computed for.
+        """
+        # The load per controller changes with the cluster size, so the average restarts from the sample
+        if num_active != self._smoothed_active:
+            self._smoothed_active = num_active
+            self.smoothed_load = self.current_avg_load
+            self._over_count = self._under_count = 0
+        else:
+            self.smoothed_load = (self.LOAD_EWMA_ALPHA * self.current_avg_load
+                                  + (1 - self.LOAD_EWMA_ALPHA) * self.smoothed_load)
+
+        if self.smoothed_load > self.TARGET_LOAD_PER_CONTROLLER:
+            self._over_count += 1
+            self._under_count = 0
+        elif self.smoothed_load < self.MIN_LOAD_PER_CONTROLLER:
+            self._under_count += 1
+            self._over_count = 0
+        else:
+            self._over_count = self._under_count = 0
+
+    def notify(self):
+        """
+        Wakes up the monitoring loop so the metrics are checked right away.
+        """
+        self._wake.set()
 
     # --- MAIN LOOP ---
 
@@ -388,15 +622,19 @@ class RyuLoadBalancer(BaseLogger):
         self.logger.info("Starting SDN Auto-Scaling Load Balancer")
         flask_thread = threading.Thread(target=self.api.run, daemon=True)
         flask_thread.start()
+        threading.Thread(target=self._watch_docker_events, daemon=True).start()
 
         # Monitoring Loop
         try:
             while True:
                 if not self.monitoring_active:
-                    time.sleep(1)
+                    # Woken up by notify() as soon as monitoring is turned on
+                    self._wake.wait(timeout=1)
+                    self._wake.clear()
                     continue
                 
-                time.sleep(self.CHECK_INTERVAL)
+                self._wake.wait(timeout=self._next_check_interval())
+                self._wake.clear()
 
                 # Get Metrics
                 total_pps, controller_rates = self.get_traffic_metrics()
@@ -408,24 +646,28 @@ class RyuLoadBalancer(BaseLogger):
                     self.current_avg_load = total_pps / num_active
                 else:
                     self.current_avg_load = 0
+                self._update_smoothed_load(num_active)
                     
                 # Implement Scaling Logic
                 if self.auto_mode:
                     # Check if the cooldwown period has passed
-                    cooldown_ok = (time.time() - self.last_scale_action_time) > self.COOLDOWN_TIME
+                    now = time.time()
+                    cooldown_ok = (now - self.last_scale_action_time) > self.COOLDOWN_TIME
                     if not self.is_scaling and cooldown_ok:
                         # Scaling UP and DOWN conditions
-                        if self.current_avg_load > self.TARGET_LOAD_PER_CONTROLLER:
+                        if self._over_count >= self.SCALE_CONFIRM_SAMPLES:
                             if num_active < self.MAX_CONTROLLERS:
-                                self.logger.warning(f" [AUTO] LOAD {self.current_avg_load:.1f} > TARGET. SCALING UP.")
+                                self.logger.warning(f" [AUTO] LOAD {self.smoothed_load:.1f} > TARGET. SCALING UP.")
+                                self._over_count = 0
                                 self.is_scaling = True
-                                self.last_scale_action_time = time.time()
+                                self.last_scale_action_time = now
                                 threading.Thread(target=self.scale_up).start()
                             
-                        elif self.current_avg_load < self.MIN_LOAD_PER_CONTROLLER and num_active > self.MIN_CONTROLLERS:
-                            self.logger.warning(f" [AUTO] LOAD {self.current_avg_load:.1f} < MIN. SCALING DOWN.")
+                        elif self._under_count >= self.SCALE_CONFIRM_SAMPLES and num_active > self.MIN_CONTROLLERS:
+                            self.logger.warning(f" [AUTO] LOAD {self.smoothed_load:.1f} < MIN. SCALING DOWN.")
+                            self._under_count = 0
                             self.is_scaling = True 
-                            self.last_scale_action_time = time.time()
+                            self.last_scale_action_time = now
                             threading.Thread(target=self.scale_down).start()
 
         except KeyboardInterrupt:
@@ -1,6 +1,6 @@
 import os
 from urllib import request
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
 import time
 import threading
@@ -19,12 +19,28 @@ class LoadBalancerAPI():
         # Load Balancer Instance
         self.balancer = load_balancer
         
+        # /status snapshot shared by all dashboard clients
+        self.STATUS_CACHE_TTL = 1
+        self.EVENTS_PERIOD = 1                  # Seconds between two /events messages
+        self.EVENTS_MAX_MESSAGES = 300          # Messages per /events stream before the client reconnects
+        self.EVENTS_RETRY_MS = 1000             # EventSource reconnection delay
+        self._status_cache = {'t': 0.0, 'body': None}
+
         # Flask App Setup
         self.app = Flask(__name__)
         CORS(self.app)
         self._setup_routes()
         
     def _setup_routes(self):
+
+        @self.app.after_request
+        def invalidate_status(response):
+            """
+            Drops the cached /status snapshot after any state-changing request.
+            """
+            if request.method == 'POST':
+                self._status_cache['body'] = None
+            return response
         
         @self.app.route('/init_mininet', methods=['POST'])
         def init_mininet():
@@ -40,6 +56,7 @@ class LoadBalancerAPI():
             
             try:
                 subprocess.Popen(["sudo", "python3", "ryu_scenario/run_scenario.py"])
+                self.balancer.invalidate_switches_cache()
                 return jsonify({"status": "success", "message": "Mininet started successfully"})
             
             except Exception as e:
@@ -59,13 +76,15 @@ class LoadBalancerAPI():
             self.balancer.logger.info(" [API] Stopping Mininet Scenario")
             
             try:
-                subprocess.run("sudo mn -c", shell=True)
+                subprocess.run(["sudo", "mn", "-c"])
+                self.balancer.invalidate_switches_cache()
                 for c_id in list(self.balancer.active_controllers):
                     self.balancer.stop_controller(c_id)
                 
-                self.balancer.active_controllers.clear()
+                self.balancer.clear_controllers()
                 self.balancer.current_avg_load = 0
                 self.balancer.monitoring_active = False
+                self.balancer.notify()
                
                 return jsonify({"status": "success", "message": "Mininet stopped successfully"})
             
@@ -86,7 +105,8 @@ class LoadBalancerAPI():
             self.balancer.logger.info(" [API] Starting Controller Cluster")
             self.balancer.scale_up()
             self.balancer.monitoring_active = True
-            return jsonify({"status": "success", "message": f" Cluster created. Active Controllers: {sorted(list(self.balancer.active_controllers))}"})
+            self.balancer.notify()
+            return jsonify({"status": "success", "message": f" Cluster created. Active Controllers: {list(self.balancer.sorted_controllers)}"})
                 
         @self.app.route('/scale_up', methods=['POST'])
         def scale_up():
@@ -101,7 +121,7 @@ class LoadBalancerAPI():
             self.balancer.logger.info(" [API] Create New Controller")
             self.balancer.scale_up()
             
-            return jsonify({"status": "success", "message": f" New controller created. Total Active: {sorted(list(self.balancer.active_controllers))}"})
+            return jsonify({"status": "success", "message": f" New controller created. Total Active: {list(self.balancer.sorted_controllers)}"})
 
         @self.app.route('/scale_down', methods=['POST'])
         def scale_down():
@@ -116,7 +136,7 @@ class LoadBalancerAPI():
             self.balancer.logger.info(" [API] Remove Controller")
             self.balancer.scale_down()
             
-            return jsonify({"status": "success", "message": f" Removed controller. Total Active: {sorted(list(self.balancer.active_controllers))}"})
+            return jsonify({"status": "success", "message": f" Removed controller. Total Active: {list(self.balancer.sorted_controllers)}"})
 
         @self.app.route('/init_balancer', methods=['POST'])
         def init_balancer():
@@ -155,6 +175,7 @@ class LoadBalancerAPI():
         def get_status():
             """
             Returns real-time metrics for the charts and status indicators.
+            Dashboards should subscribe to /events instead of polling this endpoint.
             
             Returns:
                 Response: A JSON response containing:
@@ -166,15 +187,32 @@ class LoadBalancerAPI():
                     - auto_mode (bool): True if the load balancer is in automatic mode.
                     - scaling_status_msg (str): Status message for scaling actions.
             """
-            return jsonify({
-                "active_controllers": sorted(list(self.balancer.active_controllers)),
-                "avg_load": round(self.balancer.current_avg_load, 2),
-                "individual_rates": self.balancer.current_rates,
-                "is_scaling": (time.time() - self.balancer.last_scale_action_time) < self.balancer.COOLDOWN_TIME,
-                "max_controllers": self.balancer.MAX_CONTROLLERS,
-                "auto_mode": self.balancer.auto_mode,
-                "scaling_msg": self.balancer.scaling_status_msg
-            })
+            response = self.app.response_class(self._status_body(), mimetype='application/json')
+            response.headers['Cache-Control'] = f"max-age={self.STATUS_CACHE_TTL}"
+            return response
+
+        @self.app.route('/events', methods=['GET'])
+        def events():
+            """
+            Streams the /status snapshot as Server-Sent Events, one message every EVENTS_PERIOD seconds.
+            The stream ends after EVENTS_MAX_MESSAGES messages or when the client disconnects,
+            so a closed tab does not keep a server thread, and the browser's EventSource reconnects.
+
+            Returns:
+                Response: A 'text/event-stream' response whose messages carry the /status JSON.
+            """
+            def stream():
+                try:
+                    yield f"retry: {self.EVENTS_RETRY_MS}\n\n"
+                    for _ in range(self.EVENTS_MAX_MESSAGES):
+                        yield f"data: {self._status_body()}\n\n"
+                        time.sleep(self.EVENTS_PERIOD)
+                except GeneratorExit:
+                    # Client disconnected
+                    return
+
+            return Response(stream(), mimetype='text/event-stream',
+                            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
         @self.app.route('/generate_traffic', methods=['POST'])
         def generate_traffic():
@@ -194,15 +232,14 @@ class LoadBalancerAPI():
 
             self.balancer.logger.info(f" [API] Generating Traffic-> {pps} PPS for {duration}s")
             try:
-                pid_cmd = "pgrep -f 'mininet:m_p1'"
-                pid_bytes = subprocess.check_output(pid_cmd, shell=True)
+                pid_bytes = subprocess.check_output(["pgrep", "-f", "mininet:m_p1"])
                 pid = pid_bytes.decode('utf-8').strip().split('\n')[0]
                 
                 if not pid:
                     raise Exception("Host m_p1 PID not found. Is Mininet running?")
 
-                cmd = f"sudo mnexec -a {pid} python3 ryu_scenario/traffic_gen.py {pps} {duration} &"
-                subprocess.Popen(cmd, shell=True)
+                cmd = ["sudo", "mnexec", "-a", pid, "python3", "ryu_scenario/traffic_gen.py", str(pps), str(duration)]
+                subprocess.Popen(cmd, start_new_session=True)
                 return jsonify({"status": "success", "message": f"Traffic Injection Started: {pps} PPS for {duration}s on m_p1"})
             
             except Exception as e:
@@ -210,6 +247,28 @@ class LoadBalancerAPI():
                 return jsonify({"status": "error", "message": str(e)}), 500
 
         
+    def _status_body(self):
+        """
+        Builds the JSON status snapshot, reused for STATUS_CACHE_TTL seconds.
+
+        Returns:
+            str: Serialized status of the load balancer.
+        """
+        now = time.time()
+        body = self._status_cache['body']
+        if body is None or now - self._status_cache['t'] >= self.STATUS_CACHE_TTL:
+            body = json.dumps({
+                "active_controllers": list(self.balancer.sorted_controllers),
+                "avg_load": round(self.balancer.current_avg_load, 2),
+                "individual_rates": self.balancer.current_rates,
+                "is_scaling": (now - self.balancer.last_scale_action_time) < self.balancer.COOLDOWN_TIME,
+                "max_controllers": self.balancer.MAX_CONTROLLERS,
+                "auto_mode": self.balancer.auto_mode,
+                "scaling_msg": self.balancer.scaling_status_msg
+            })
+            self._status_cache.update(t=now, body=body)
+        return body
+
     def run(self):
         """
         Launching Flask Server
@@ -3,7 +3,7 @@ import random
 import time
 import sys
 
-def generate_traffic(target_ip_prefix, rate_pps, duration):
+def generate_traffic(target_ip_prefix, rate_pps, duration, sender_host=1):
     """
     Generates UDP traffic towards random IP addresses to force Packet-In messages.
 
@@ -14,54 +14,84 @@ def generate_traffic(target_ip_prefix, rate_pps, duration):
         target_ip_prefix (str): The subnet prefix for destination IPs
         rate_pps (int): Target transmission rate in Packets Per Second.
         duration (int): Total duration of the traffic generation in seconds.
+        sender_host (int): Host number of the sender within the prefix, never used as destination.
     """
     print(f"--- Starting Generator: {rate_pps} PPS for {duration}s ---")
     
     # Create a simple UDP socket
     sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    # Large send buffer and non-blocking sends, so a full queue drops packets instead of stalling the pacing
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4 * 1024 * 1024)
+    sock.setblocking(False)
     
-    interval = 1.0 / rate_pps
-    end_time = time.time() + duration
+    # Destination table and bound random source, built once. The sender itself is not a destination
+    hosts = [f"{target_ip_prefix}{i}" for i in range(1, 255) if i != sender_host]
+    num_hosts = len(hosts)
+    num_ports = 65001 - 1024
+    getrandbits = random.getrandbits
+    # Random (dst_ip, dst_port) pairs are drawn in batches and refilled when used up
+    batch_size = 4096
+    destinations = []
+    next_dst = batch_size
+    # Small dummy payload and bound methods, resolved once instead of per packet
+    msg = b"TEST_PACKET"
+    sendto = sock.sendto
+    clock = time.monotonic_ns
+
+    # Integer nanosecond schedule: packet n is due at start + n * 1e9 / rate_pps
+    start = clock()
+    end_time = start + duration * 1_000_000_000
+    scheduled = 0
     packets_sent = 0
+    packets_dropped = 0
 
     try:
-        while time.time() < end_time:
-            start_loop = time.time()
-            
-            # Generate a random destination IP
-            random_host = random.randint(1, 254)
-            dst_ip = f"{target_ip_prefix}{random_host}"
-            
-            # Send a small packet (dummy payload)
-            msg = b"TEST_PACKET"
-            try:
-                # Use a random port
-                dst_port = random.randint(1024, 65000)
-                sock.sendto(msg, (dst_ip, dst_port))
-                packets_sent += 1
-            except Exception as e:
-                pass
+        while True:
+            now = clock()
+            if now >= end_time:
+                break
+
+            # Token bucket: send every packet that is due, then sleep until the next one
+            credits = (now - start) * rate_pps // 1_000_000_000 + 1 - scheduled
+            for _ in range(credits):
+                # Random destination IP and port
+                if next_dst == batch_size:
+                    # Rejection sampling keeps hosts and ports uniform, a modulo would favour the lowest ones
+                    destinations = []
+                    while len(destinations) < batch_size:
+                        host = getrandbits(8)
+                        port = getrandbits(16)
+                        if host < num_hosts and port < num_ports:
+                            destinations.append((hosts[host], 1024 + port))
+                    next_dst = 0
+                destination = destinations[next_dst]
+                next_dst += 1
 
-            # Simple Rate Limiting logic
-            elapsed = time.time() - start_loop
-            sleep_time = interval - elapsed
-            if sleep_time > 0:
-                time.sleep(sleep_time)
+                try:
+                    sendto(msg, destination)
+                    packets_sent += 1
+                except OSError:
+                    # Send buffer full (BlockingIOError) or no route to the destination
+                    packets_dropped += 1
+
+            scheduled += credits
+            sleep_ns = start + scheduled * 1_000_000_000 // rate_pps - clock()
+            if sleep_ns > 0:
+                time.sleep(sleep_ns / 1e9)
                 
     except KeyboardInterrupt:
         print("\nStopped by user.")
     
-    print(f"--- Finished. Sent: {packets_sent} packets. ---")
+    print(f"--- Finished. Sent: {packets_sent} packets, dropped: {packets_dropped}. ---")
 
 if __name__ == "__main__":
     if len(sys.argv) != 3:
         print("Usage: python3 traffic_gen.py <PPS> <DURATION>")
         print("Example: python3 traffic_gen.py 60 20")
         sys.exit(1)
-        sys.exit(1)
         
     pps = int(sys.argv[1])
     sec = int(sys.argv[2])
     
-    # Assuming network 10.0.0.X
-    generate_traffic("10.0.0.", pps, sec)
\ No newline at end of file
+    # Assuming network 10.0.0.X, launched on m_p1 (10.0.0.1)
+    generate_traffic("10.0.0.", pps, sec, sender_host=1)
\ No newline at end of file